@@ -131,7 +131,7 @@ class AnnotationService(BookwormService):
     @classmethod
     def comments_page_handler(cls, sender, current, prev):
         comments = NoteTaker(sender).get_for_page()
-        if comments.count():
+        if comments:
             if config.conf["annotation"]["play_sound_for_comments"]:
                 wx.CallLater(150, lambda: sounds.has_note.play())
         for comment in comments:
@@ -142,10 +142,9 @@ class AnnotationService(BookwormService):
         if not config.conf["annotation"]["use_visuals"]:
             return
         bookmarks = Bookmarker(sender).get_for_page()
-        if not bookmarks.count():
+        if not bookmarks:
             return
-        for bookmark in bookmarks:
-            cls.style_bookmark(sender.view, bookmark.position)
+        cls.style_many(sender.view, bookmarks=[bkm.position for bkm in bookmarks])
 
     @classmethod
     def highlight_highlighted_text(cls, sender, current, prev):
@@ -153,21 +152,41 @@ class AnnotationService(BookwormService):
             return
         quoter = Quoter(sender)
         for_page = quoter.get_for_page()
-        if not for_page.count():
+        if not for_page:
             return
-        for quote in for_page:
-            cls.style_highlight(sender.view, quote.start_pos, quote.end_pos)
+        cls.style_many(
+            sender.view, highlights=[(q.start_pos, q.end_pos) for q in for_page]
+        )
+
+    @classmethod
+    @gui_thread_safe
+    def style_many(cls, view, bookmarks=(), highlights=()):
+        """Apply a whole page's worth of annotation styling in one
+        frozen pass, instead of a styling round-trip (and a repaint)
+        per annotation.
+        """
+        ctrl = view.contentTextCtrl
+        ctrl.Freeze()
+        try:
+            for position in bookmarks:
+                cls._do_style_bookmark(view, position)
+            for start, end in highlights:
+                view.highlight_range(start, end, background=wx.YELLOW)
+        finally:
+            ctrl.Thaw()
 
     @staticmethod
     @gui_thread_safe
     def style_bookmark(view, position, enable=True):
-        if not config.conf["annotation"]["use_visuals"]:
-            return
-        start, end = view.get_containing_line(position)
         if config.conf["annotation"]["use_visuals"]:
-            attr = wx.TextAttr(view.contentTextCtrl.GetDefaultStyle())
-            attr.SetFontUnderlined(enable)
-            view.contentTextCtrl.SetStyle(start, end, attr)
+            AnnotationService._do_style_bookmark(view, position, enable)
+
+    @staticmethod
+    def _do_style_bookmark(view, position, enable=True):
+        start, end = view.get_containing_line(position)
+        attr = wx.TextAttr(view.contentTextCtrl.GetDefaultStyle())
+        attr.SetFontUnderlined(enable)
+        view.contentTextCtrl.SetStyle(start, end, attr)
 
     @staticmethod
     @gui_thread_safe
@@ -17,6 +17,7 @@ from bookworm.gui.components import (
     make_sized_static_box,
 )
 from .annotator import (
+    TAG_PATTERN,
     Bookmarker,
     NoteTaker,
     Quoter,
@@ -527,7 +528,9 @@ class AnnotationWithContentDialog(SimpleDialog):
             value=" ".join(item.tags),
         )
         if new_tags is not None:
-            self.annotator.update(item.id, tags=[t.strip() for t in new_tags.split()])
+            self.annotator.update(
+                item.id, tags=[tag.lower() for tag in TAG_PATTERN.findall(new_tags)]
+            )
             self.filterPanel.update_choices()
 
     def onExport(self, event):
@@ -1,14 +1,15 @@
 # coding: utf-8
 
+import sys
 import wx
 from enum import IntEnum
 from bookworm import config
 from bookworm import speech
+from bookworm.signals import reader_book_unloaded
 from bookworm.utils import gui_thread_safe
 from bookworm.gui.settings import SettingsPanel
-from bookworm.gui.contentview_ctrl import SelectionRange
 from bookworm.logger import logger
-from .annotator import Bookmarker, NoteTaker, Quoter
+from .annotator import Bookmarker, NoteTaker, Quoter, annotation_writer
 from .annotation_dialogs import (
     BookmarksViewer,
     CommentsDialog,
@@ -21,6 +22,59 @@ from .annotation_dialogs import (
 log = logger.getChild(__name__)
 
 
+def N_(text):
+    """Mark a string for extraction by pybabel without translating it
+    at definition time; the actual `_()` call happens when the menu
+    items are built.
+    """
+    return text
+
+
+def _init_strings():
+    """Translate, and intern, the strings used by the annotation event
+    handlers. Doing the gettext lookups once here, rather than on every
+    handler invocation, keeps the hot paths free of catalog lookups; the
+    function runs when the menu is constructed, after the active
+    language has been set, and can simply be rerun should the locale
+    ever change at runtime.
+    """
+    global _ADD_NAMED_BOOKMARK_TITLE, _BOOKMARK_NAME_LABEL, _BOOKMARK_ADDED_MSG
+    global _NEW_COMMENT_TITLE, _COMMENT_LABEL, _TAG_COMMENT_TITLE, _TAGS_LABEL
+    global _TAG_HIGHLIGHT_TITLE, _NO_SELECTION_MSG, _HIGHLIGHT_REMOVED_MSG
+    global _ALREADY_HIGHLIGHTED_MSG, _HIGHLIGHT_EXTENDED_MSG
+    global _BOOKMARKS_VIEWER_TITLE, _COMMENTS_VIEWER_TITLE, _QUOTES_VIEWER_TITLE
+    # Translators: title of a dialog
+    _ADD_NAMED_BOOKMARK_TITLE = sys.intern(_("Add Named Bookmark"))
+    # Translators: label of a text entry
+    _BOOKMARK_NAME_LABEL = sys.intern(_("Bookmark name:"))
+    # Translators: spoken message
+    _BOOKMARK_ADDED_MSG = sys.intern(_("Bookmark Added"))
+    # Translators: the title of a dialog to add a comment
+    _NEW_COMMENT_TITLE = sys.intern(_("New Comment"))
+    # Translators: the label of an edit field to enter a comment
+    _COMMENT_LABEL = sys.intern(_("Comment:"))
+    # Translators: title of a dialog
+    _TAG_COMMENT_TITLE = sys.intern(_("Tag Comment"))
+    # Translators: label of a text entry
+    _TAGS_LABEL = sys.intern(_("Tags:"))
+    # Translators: title of a dialog
+    _TAG_HIGHLIGHT_TITLE = sys.intern(_("Tag Highlight"))
+    # Translators: spoken message
+    _NO_SELECTION_MSG = sys.intern(_("No selection"))
+    # Translators: spoken message
+    _HIGHLIGHT_REMOVED_MSG = sys.intern(_("Highlight removed"))
+    # Translators: spoken message
+    _ALREADY_HIGHLIGHTED_MSG = sys.intern(_("Already highlighted"))
+    # Translators: spoken message
+    _HIGHLIGHT_EXTENDED_MSG = sys.intern(_("Highlight extended"))
+    # Translators: the title of a dialog to view bookmarks
+    _BOOKMARKS_VIEWER_TITLE = sys.intern(_("Bookmarks | {book}"))
+    # Translators: the title of a dialog to view comments
+    _COMMENTS_VIEWER_TITLE = sys.intern(_("Comments"))
+    # Translators: the title of a dialog to view highlights
+    _QUOTES_VIEWER_TITLE = sys.intern(_("Highlights"))
+
+
 class AnnotationSettingsPanel(SettingsPanel):
     config_section = "annotation"
 
@@ -74,115 +128,171 @@ ANNOTATIONS_KEYBOARD_SHORTCUTS = {
 class AnnotationMenu(wx.Menu):
     """Annotation menu."""
 
-    def __init__(self, service, menubar):
-        super().__init__()
-        self.service = service
-        self.view = service.view
-        self.reader = service.reader
-        self.menubar = menubar
-
-        # Add menu items
-        self.Append(
+    # Item id, label, help text, and handler name for every menu item.
+    # Labels are run through `_()` when the items are built, so locale
+    # switches are honoured; iterating a table here beats a long run of
+    # repeated Append/Bind statements both in code size and in init time.
+    _MENU_ITEMS = (
+        (
             AnnotationsMenuIds.addBookmark,
             # Translators: the label of an item in the application menubar
-            _("Add &Bookmark\tCtrl-B"),
+            N_("Add &Bookmark\tCtrl-B"),
             # Translators: the help text of an item in the application menubar
-            _("Add a bookmark at the current position"),
-        )
-        self.Append(
+            N_("Add a bookmark at the current position"),
+            "onAddBookmark",
+        ),
+        (
             AnnotationsMenuIds.addNamedBookmark,
             # Translators: the label of an item in the application menubar
-            _("Add &Named Bookmark...\tCtrl-Shift-B"),
+            N_("Add &Named Bookmark...\tCtrl-Shift-B"),
             # Translators: the help text of an item in the application menubar
-            _("Add a named bookmark at the current position"),
-        )
-        self.Append(
+            N_("Add a named bookmark at the current position"),
+            "onAddNamedBookmark",
+        ),
+        (
             AnnotationsMenuIds.addNote,
             # Translators: the label of an item in the application menubar
-            _("Add Co&mment...\tCtrl-M"),
+            N_("Add Co&mment...\tCtrl-M"),
             # Translators: the help text of an item in the application menubar
-            _("Add a comment at the current position"),
-        )
-        self.Append(
+            N_("Add a comment at the current position"),
+            "onAddNote",
+        ),
+        (
             AnnotationsMenuIds.quoteSelection,
             # Translators: the label of an item in the application menubar
-            _("&Highlight Selection\tCtrl-H"),
+            N_("&Highlight Selection\tCtrl-H"),
             # Translators: the help text of an item in the application menubar
-            _("Highlight selected text and save it."),
-        )
-        self.Append(
+            N_("Highlight selected text and save it."),
+            "onQuoteSelection",
+        ),
+        (
             AnnotationsMenuIds.viewBookmarks,
             # Translators: the label of an item in the application menubar
-            _("Saved &Bookmarks..."),
+            N_("Saved &Bookmarks..."),
             # Translators: the help text of an item in the application menubar
-            _("View added bookmarks"),
-        )
-        self.Append(
+            N_("View added bookmarks"),
+            "onViewBookmarks",
+        ),
+        (
             StatelessAnnotationsMenuIds.viewNotes,
             # Translators: the label of an item in the application menubar
-            _("Saved Co&mments..."),
+            N_("Saved Co&mments..."),
             # Translators: the help text of an item in the application menubar
-            _("View, edit, and remove comments."),
-        )
-        self.Append(
+            N_("View, edit, and remove comments."),
+            "onViewNotes",
+        ),
+        (
             StatelessAnnotationsMenuIds.viewQuotes,
             # Translators: the label of an item in the application menubar
-            _("Saved &Highlights..."),
+            N_("Saved &Highlights..."),
             # Translators: the help text of an item in the application menubar
-            _("View saved highlights."),
+            N_("View saved highlights."),
+            "onViewQuotes",
+        ),
+    )
+
+    def __init__(self, service, menubar):
+        super().__init__()
+        _init_strings()
+        self.service = service
+        self.view = service.view
+        self.reader = service.reader
+        self.menubar = menubar
+        self._line_bounds_cache = None
+        self._items_built = False
+        reader_book_unloaded.connect(
+            self._invalidate_line_bounds_cache, sender=self.reader
         )
 
         # Translators: the label of an item in the application menubar
         self.menubar.Insert(2, self, _("&Annotations"))
+        # Building the actual menu items is deferred to the first
+        # time a menu is opened. Till then, the keyboard shortcuts
+        # keep working through the accelerator table, which dispatches
+        # to the handlers bound below.
+        self.view.Bind(wx.EVT_MENU_OPEN, self.onMenuOpen)
 
         # EventHandlers
-        self.view.Bind(
-            wx.EVT_MENU, self.onAddBookmark, id=AnnotationsMenuIds.addBookmark
-        )
-        self.view.Bind(
-            wx.EVT_MENU, self.onAddNamedBookmark, id=AnnotationsMenuIds.addNamedBookmark
-        )
-        self.view.Bind(wx.EVT_MENU, self.onAddNote, id=AnnotationsMenuIds.addNote)
-        self.view.Bind(
-            wx.EVT_MENU, self.onQuoteSelection, id=AnnotationsMenuIds.quoteSelection
-        )
-        self.view.Bind(
-            wx.EVT_MENU, self.onViewBookmarks, id=AnnotationsMenuIds.viewBookmarks
-        )
-        self.view.Bind(
-            wx.EVT_MENU, self.onViewNotes, id=StatelessAnnotationsMenuIds.viewNotes
-        )
-        self.view.Bind(
-            wx.EVT_MENU, self.onViewQuotes, id=StatelessAnnotationsMenuIds.viewQuotes
+        for item_id, __, __, handler_name in self._MENU_ITEMS:
+            self.view.Bind(wx.EVT_MENU, getattr(self, handler_name), id=item_id)
+
+    def onMenuOpen(self, event):
+        event.Skip()
+        if not self._items_built:
+            self._build_menu_items()
+
+    def _build_menu_items(self):
+        """Create the menu items, off the startup critical path."""
+        self._items_built = True
+        for item_id, label, help_text, __ in self._MENU_ITEMS:
+            self.Append(item_id, _(label), _(help_text))
+        # Stateful items track whether a book is currently open
+        for item_id in AnnotationsMenuIds:
+            self.Enable(item_id, self.reader.ready)
+
+    def _invalidate_line_bounds_cache(self, sender):
+        self._line_bounds_cache = None
+
+    def _get_line_bounds(self, position):
+        """Boundaries of the line containing the given position.
+        The result is cached, so repeated invocations on the same
+        line skip the costly native XY conversion.
+        """
+        if self._line_bounds_cache is not None:
+            page, start, end = self._line_bounds_cache
+            if (page == self.reader.current_page) and (start <= position <= end):
+                return start, end
+        start, end = self.view.get_containing_line(position)
+        self._line_bounds_cache = (self.reader.current_page, start, end)
+        return start, end
+
+    def _submit_create(self, annotator, tags_text=None, **kwargs):
+        """Queue an annotation creation on the background writer.
+
+        The current reader state is captured here, on the GUI thread,
+        since the actual write happens later on the writer thread.
+        """
+        kwargs.update(
+            book_id=annotator.current_book.id,
+            page_number=self.reader.current_page,
+            section_title=self.reader.active_section.title,
+            section_identifier=self.reader.active_section.unique_identifier,
         )
 
+        def create():
+            annot = annotator.create(commit=False, **kwargs)
+            if tags_text:
+                type(annotator).add_tags(annot, tags_text, commit=False)
+
+        annotation_writer.submit(create)
+
     def _add_bookmark(self, name=""):
         bookmarker = Bookmarker(self.reader)
         insertionPoint = self.view.contentTextCtrl.GetInsertionPoint()
-        __, __, current_lino = self.view.contentTextCtrl.PositionToXY(insertionPoint)
-        count = 0
-        for bkm in bookmarker.get_for_page(self.reader.current_page):
-            __, __, lino = self.view.contentTextCtrl.PositionToXY(bkm.position)
-            if lino == current_lino:
-                count += 1
-                bookmarker.delete(bkm.id)
-                self.service.style_bookmark(self.view, bkm.position, enable=False)
-        if count and not name:
-            return speech.announce("Bookmark removed.")
-        Bookmarker(self.reader).create(title=name, position=insertionPoint)
-        # Translators: spoken message
-        speech.announce(_("Bookmark Added"))
+        line_start, line_end = self._get_line_bounds(insertionPoint)
+        annotation_writer.flush()
+        existing_ids = [
+            bkm.id
+            for bkm in bookmarker.get_for_position_range(
+                self.reader.current_page, line_start, line_end
+            )
+        ]
+        if existing_ids:
+            annotation_writer.submit(bookmarker.delete_many, existing_ids, commit=False)
+            self.service.style_bookmark(self.view, insertionPoint, enable=False)
+            if not name:
+                return speech.announce("Bookmark removed.")
+        self._submit_create(bookmarker, title=name, position=insertionPoint)
+        speech.announce(_BOOKMARK_ADDED_MSG)
         self.service.style_bookmark(self.view, insertionPoint)
 
     def onAddBookmark(self, event):
         self._add_bookmark()
 
     def onAddNamedBookmark(self, event):
-        bookmark_name = self.view.get_text_from_user(
-            # Translators: title of a dialog
-            _("Add Named Bookmark"),
-            # Translators: label of a text entry
-            _("Bookmark name:"),
+        bookmark_name = (
+            self.view.get_text_from_user(_ADD_NAMED_BOOKMARK_TITLE, _BOOKMARK_NAME_LABEL)
+            or ""
         ).strip()
         if bookmark_name:
             self._add_bookmark(bookmark_name)
@@ -191,95 +301,89 @@ class AnnotationMenu(wx.Menu):
         _with_tags = wx.GetKeyState(wx.WXK_SHIFT)
         insertionPoint = self.view.contentTextCtrl.GetInsertionPoint()
         comment_text = self.view.get_text_from_user(
-            # Translators: the title of a dialog to add a comment
-            _("New Comment"),
-            # Translators: the label of an edit field to enter a comment
-            _("Comment:"),
+            _NEW_COMMENT_TITLE,
+            _COMMENT_LABEL,
             style=wx.OK | wx.CANCEL | wx.TE_MULTILINE | wx.CENTER,
         )
         if not comment_text:
             return
-        note = NoteTaker(self.reader).create(
-            title="", content=comment_text, position=insertionPoint
-        )
-        self.service.style_comment(self.view, insertionPoint)
+        tags_text = None
         if _with_tags:
             # add tags
-            tags_text = self.view.get_text_from_user(
-                # Translators: title of a dialog
-                _("Tag Comment"),
-                # Translators: label of a text entry
-                _("Tags:"),
-            )
-            if tags_text:
-                for tag in tags_text.split():
-                    note.tags.append(tag.strip())
-                NoteTaker.model.session.commit()
+            tags_text = self.view.get_text_from_user(_TAG_COMMENT_TITLE, _TAGS_LABEL)
+        self._submit_create(
+            NoteTaker(self.reader),
+            tags_text=tags_text,
+            title="",
+            content=comment_text,
+            position=insertionPoint,
+        )
+        self.service.style_comment(self.view, insertionPoint)
 
     def onQuoteSelection(self, event):
         _with_tags = wx.GetKeyState(wx.WXK_SHIFT)
         quoter = Quoter(self.reader)
         selected_text = self.view.contentTextCtrl.GetStringSelection()
         if not selected_text:
-            return speech.announce(_("No selection"))
+            return speech.announce(_NO_SELECTION_MSG)
         x, y = self.view.get_selection_range()
-        for q in quoter.get_for_page():
-            q_range = SelectionRange(q.start_pos, q.end_pos)
-            if (q_range.start == x) and (q_range.end == y):
-                quoter.delete(q.id)
+        annotation_writer.flush()
+        for q in quoter.get_overlapping_for_page(x, y):
+            q_start, q_end = q.start_pos, q.end_pos
+            if (q_start == x) and (q_end == y):
+                annotation_writer.submit(quoter.delete, q.id, commit=False)
                 self.service.style_highlight(self.view, x, y, enable=False)
-                # Translators: spoken message
-                return speech.announce(_("Highlight removed"))
-            elif (q.start_pos < x) and (q.end_pos > y):
-                # Translators: spoken message
-                speech.announce(_("Already highlighted"))
+                return speech.announce(_HIGHLIGHT_REMOVED_MSG)
+            elif (q_start < x) and (q_end > y):
+                speech.announce(_ALREADY_HIGHLIGHTED_MSG)
                 return wx.Bell()
-            if (x in q_range) or (y in q_range):
-                if x not in q_range:
+            if (q_start <= x <= q_end) or (q_start <= y <= q_end):
+                if not (q_start <= x <= q_end):
                     q.start_pos = x
                     q.session.commit()
-                    self.service.style_highlight(self.view, x, q_range.end)
-                    return speech.announce(_("Highlight extended"))
-                elif y not in q_range:
+                    quoter.invalidate_page_cache()
+                    self.service.style_highlight(self.view, x, q_end)
+                    return speech.announce(_HIGHLIGHT_EXTENDED_MSG)
+                elif not (q_start <= y <= q_end):
                     q.end_pos = y
                     q.session.commit()
-                    self.service.style_highlight(self.view, q_range.start, y)
-                    # Translators: spoken message
-                    return speech.announce(_("Highlight extended"))
-        quote = quoter.create(title="", content=selected_text, start_pos=x, end_pos=y)
+                    quoter.invalidate_page_cache()
+                    self.service.style_highlight(self.view, q_start, y)
+                    return speech.announce(_HIGHLIGHT_EXTENDED_MSG)
+        tags_text = None
+        if _with_tags:
+            # add tags
+            tags_text = self.view.get_text_from_user(_TAG_HIGHLIGHT_TITLE, _TAGS_LABEL)
+        self._submit_create(
+            quoter,
+            tags_text=tags_text,
+            title="",
+            content=selected_text,
+            start_pos=x,
+            end_pos=y,
+        )
         # Translators: spoken message
         speech.announce("Selection highlighted")
         self.service.style_highlight(self.view, x, y)
-        if _with_tags:
-            # add tags
-            tags_text = self.view.get_text_from_user(
-                # Translators: title of a dialog
-                _("Tag Highlight"),
-                # Translators: label of a text entry
-                _("Tags:"),
-            )
-            if tags_text:
-                for tag in tags_text.split():
-                    quote.tags.append(tag.strip())
-                Quoter.model.session.commit()
 
     def onViewBookmarks(self, event):
+        annotation_writer.flush()
         with BookmarksViewer(
             parent=self.view,
             reader=self.reader,
             annotator=Bookmarker,
-            # Translators: the title of a dialog to view bookmarks
-            title=_("Bookmarks | {book}").format(book=self.reader.current_book.title),
+            title=_BOOKMARKS_VIEWER_TITLE.format(book=self.reader.current_book.title),
         ) as dlg:
             dlg.ShowModal()
 
     def onViewNotes(self, event):
+        annotation_writer.flush()
         Dialog = (
             CommentsDialog if self.reader.ready else GenericAnnotationWithContentDialog
         )
         with Dialog(
             parent=self.view,
-            title=_("Comments"),
+            title=_COMMENTS_VIEWER_TITLE,
             reader=self.reader,
             annotator_cls=NoteTaker,
             can_edit=True,
@@ -287,12 +391,13 @@ class AnnotationMenu(wx.Menu):
             dlg.ShowModal()
 
     def onViewQuotes(self, event):
+        annotation_writer.flush()
         Dialog = (
             QuotesDialog if self.reader.ready else GenericAnnotationWithContentDialog
         )
         with Dialog(
             parent=self.view,
-            title=_("Highlights"),
+            title=_QUOTES_VIEWER_TITLE,
             reader=self.reader,
             annotator_cls=Quoter,
         ) as dlg:
@@ -1,5 +1,11 @@
 # coding: utf-8
 
+import queue
+import re
+import threading
+from bisect import bisect_right
+from contextlib import contextmanager
+from itertools import islice
 from enum import IntEnum, auto
 from dataclasses import dataclass, field, astuple
 from typing import Tuple
@@ -7,6 +13,7 @@ import sqlalchemy as sa
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext import baked
 from bookworm import config
+from bookworm.signals import app_shuttingdown, reader_book_unloaded
 from bookworm.logger import logger
 from bookworm.database import Book, db
 from bookworm.database.models import Book
@@ -16,6 +23,24 @@ from .annotation_models import Bookmark, Note, Quote
 log = logger.getChild(__name__)
 # The bakery caches querie objects to avoid recompiling them into strings in every call
 BAKERY = baked.bakery()
+# Tokenizes user-entered tags in a single scan
+TAG_PATTERN = re.compile(r"\S+")
+# Serializes annotation writes across threads
+_SESSION_LOCK = threading.RLock()
+
+
+@contextmanager
+def locked_session():
+    """Guard write access to the annotations database.
+
+    Sessions themselves are thread-local, but the GUI thread and the
+    background writer can still contend on the database and on the
+    shared page caches. Holding the lock for the duration of a write
+    keeps the commits and the cache invalidation serialized; being a
+    context manager, the lock is released even when the write raises.
+    """
+    with _SESSION_LOCK:
+        yield db.Model.session()
 
 
 @dataclass
@@ -69,9 +94,25 @@ class Annotator:
     model = None
     """The model to act upon."""
 
+    _page_cache = None
+    """Caches the annotations of already visited pages."""
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Each annotator caches the pages of its own model
+        cls._page_cache = {}
+
+    @classmethod
+    def invalidate_page_cache(cls):
+        cls._page_cache.clear()
+
     def __init__(self, reader):
         self.reader = reader
-        self.session = self.model.session()
+
+    @property
+    def session(self):
+        # Resolve through the scoped registry, so each thread gets its own session
+        return self.model.session()
 
     def get_book_by_identifier(self, ident):
         return Book.query.filter(Book.identifier == ident).one_or_none()
@@ -131,7 +172,18 @@ class Annotator:
 
     def get_for_page(self, page_number=None, asc=False):
         page_number = page_number or self.reader.current_page
-        return self.model.query.filter_by(page_number=page_number)
+        cache_key = (self.current_book.id, page_number)
+        if cache_key not in self._page_cache:
+            self._page_cache[cache_key] = self.model.query.filter_by(
+                book_id=self.current_book.id, page_number=page_number
+            ).all()
+        return self._page_cache[cache_key]
+
+    def get_for_position_range(self, page_number, start_pos, end_pos):
+        """Fetch annotations within the given position range using a single query."""
+        return self.model.query.filter_by(
+            book_id=self.current_book.id, page_number=page_number
+        ).filter(self.model.position.between(start_pos, end_pos))
 
     def get_for_section(self, section_ident=None, asc=False):
         section_ident = section_ident or self.reader.active_section.unique_identifier
@@ -182,32 +234,51 @@ class Annotator:
             current_book_id=self.current_book.id
         ).first()
 
-    def create(self, **kwargs):
-        kwargs.update(
-            dict(
-                book_id=self.current_book.id,
-                page_number=self.reader.current_page,
-                section_title=self.reader.active_section.title,
-                section_identifier=self.reader.active_section.unique_identifier,
-            )
+    def create(self, commit=True, **kwargs):
+        kwargs.setdefault("book_id", self.current_book.id)
+        kwargs.setdefault("page_number", self.reader.current_page)
+        kwargs.setdefault("section_title", self.reader.active_section.title)
+        kwargs.setdefault(
+            "section_identifier", self.reader.active_section.unique_identifier
         )
         annot = self.model(**kwargs)
-        self.session.add(annot)
-        self.session.commit()
+        with locked_session() as session:
+            session.add(annot)
+            if commit:
+                session.commit()
+            self.invalidate_page_cache()
         return annot
 
-    def update(self, item_id, **kwargs):
+    def update(self, item_id, commit=True, **kwargs):
         item = self.get(item_id)
         if item is None:
             raise LookupError(f"There is no record with id={item_id}.")
         for attr, value in kwargs.items():
             setattr(item, attr, value)
-        self.session.add(item)
-        self.session.commit()
-
-    def delete(self, item_id):
-        self.session.delete(self.get(item_id))
-        self.session.commit()
+        with locked_session() as session:
+            session.add(item)
+            if commit:
+                session.commit()
+            self.invalidate_page_cache()
+
+    def delete(self, item_id, commit=True):
+        with locked_session() as session:
+            session.delete(self.get(item_id))
+            if commit:
+                session.commit()
+            self.invalidate_page_cache()
+
+    def delete_many(self, item_ids, commit=True):
+        """Delete the given records with a single statement and a single commit."""
+        if not item_ids:
+            return
+        with locked_session() as session:
+            session.query(self.model).filter(self.model.id.in_(item_ids)).delete(
+                synchronize_session=False
+            )
+            if commit:
+                session.commit()
+            self.invalidate_page_cache()
 
 
 class Bookmarker(Annotator):
@@ -219,6 +290,27 @@ class Bookmarker(Annotator):
 class TaggedAnnotator(Annotator):
     """Annotations which can be tagged."""
 
+    @classmethod
+    def add_tags(cls, item, tags_text, commit=True):
+        """Attach the tags found in the given text to an annotation.
+
+        Existing tags are fetched with a single lookup query, and all of
+        the associations are written with a single commit, instead of a
+        get-or-create round-trip per tag.
+        """
+        Tag = cls.model.Tag
+        titles = {tag.lower() for tag in TAG_PATTERN.findall(tags_text)}
+        if not titles:
+            return
+        existing = {tag.title: tag for tag in Tag.query.filter(Tag.title.in_(titles))}
+        with locked_session() as session:
+            item.related_tags.extend(
+                existing[title] if title in existing else Tag(title=title)
+                for title in titles
+            )
+            if commit:
+                session.commit()
+
     @classmethod
     def get_tags(cls):
         cls.delete_orphan_tags()
@@ -245,3 +337,112 @@ class Quoter(TaggedAnnotator):
     """Highlights."""
 
     model = Quote
+
+    _interval_index = {}
+    """A sorted (start, end, quote) index over the cached page quotes."""
+
+    @classmethod
+    def invalidate_page_cache(cls):
+        super().invalidate_page_cache()
+        cls._interval_index.clear()
+
+    def get_overlapping_for_page(self, x, y, page_number=None):
+        """Fetch the quotes on the given page whose character ranges
+        intersect the range (x, y).
+
+        Lookups are served by a sorted index over the cached page
+        quotes, so testing a selection costs a binary search instead of
+        a scan over every quote on the page.
+        """
+        page_number = page_number or self.reader.current_page
+        cache_key = (self.current_book.id, page_number)
+        if cache_key not in self._interval_index:
+            entries = sorted(
+                ((q.start_pos, q.end_pos, q) for q in self.get_for_page(page_number)),
+                key=lambda entry: entry[:2],
+            )
+            self._interval_index[cache_key] = (
+                [entry[0] for entry in entries],
+                entries,
+            )
+        starts, entries = self._interval_index[cache_key]
+        # A single fused sweep over the candidate prefix; no intermediate copies
+        return [
+            quote
+            for start_pos, end_pos, quote in islice(entries, bisect_right(starts, y))
+            if end_pos >= x
+        ]
+
+
+class AnnotationWriter:
+    """Applies annotation write operations on a background thread.
+
+    Operations submitted from the GUI are queued and executed by a single
+    daemon thread using its own thread-local session, which keeps the
+    event loop responsive under rapid annotation. Commits are coalesced:
+    the worker drains every pending operation and then commits the whole
+    batch at once, so a burst of writes costs a single commit.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def submit(self, func, *args, **kwargs):
+        """Queue the given operation for execution on the writer thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="bookworm_annotation_writer", daemon=True
+            )
+            self._thread.start()
+        self._queue.put((func, args, kwargs))
+
+    def flush(self):
+        """Block until all queued operations have been committed."""
+        if (self._thread is not None) and self._thread.is_alive():
+            self._queue.join()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            for func, args, kwargs in batch:
+                try:
+                    func(*args, **kwargs)
+                except Exception:
+                    log.exception(
+                        f"Error applying annotation operation {func}.", exc_info=True
+                    )
+            with locked_session() as session:
+                try:
+                    session.commit()
+                except SQLAlchemyError:
+                    log.exception(
+                        "Failed to commit annotation operations.", exc_info=True
+                    )
+                    session.rollback()
+            for __ in batch:
+                self._queue.task_done()
+
+
+annotation_writer = AnnotationWriter()
+
+
+@reader_book_unloaded.connect
+@app_shuttingdown.connect
+def _flush_annotation_writer(sender):
+    """Make sure pending annotation writes hit the disk before the
+    reader state they were captured against goes away."""
+    annotation_writer.flush()
+
+
+@reader_book_unloaded.connect
+@app_shuttingdown.connect
+def _clear_page_caches(sender):
+    """Drop cached page annotations so stale entries don't persist across books."""
+    for annotator in (Bookmarker, NoteTaker, Quoter):
+        annotator.invalidate_page_cache()
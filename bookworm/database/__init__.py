@@ -7,6 +7,8 @@ Persistent stoarage using SQLlite3
 import sqlite3
 import os
 import db_magic as db
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from bookworm.paths import home_data_path, db_path as get_db_path
 from bookworm.logger import logger
 from .models import *
@@ -17,6 +19,19 @@ log = logger.getChild(__name__)
 FILE_HISTORY_DB_PATH = home_data_path("file_history.db")
 
 
+@event.listens_for(Engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Turn on WAL journaling with relaxed syncing.
+
+    WAL gives readers snapshot isolation, so annotation lookups on the
+    GUI thread never stall while the background writer is committing.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
 def init_database():
     db_path = os.path.join(get_db_path(), "db.sqlite")
     if not os.path.isfile(FILE_HISTORY_DB_PATH):
@@ -17,7 +17,7 @@ from bookworm.reader import (
     UnsupportedDocumentError,
 )
 from bookworm.signals import reader_book_loaded, reader_book_unloaded
-from bookworm.gui.contentview_ctrl import ContentViewCtrl, SelectionRange
+from bookworm.gui.contentview_ctrl import ContentViewCtrl
 from bookworm.utils import gui_thread_safe
 from bookworm.logger import logger
 from .menubar import MenubarProvider, BookRelatedMenuIds
@@ -121,6 +121,7 @@ class BookViewerWindow(wx.Frame, MenubarProvider, StateProvider):
 
         self.reader = EBookReader(self)
         self._book_loaded_handlers = []
+        self._text_entry_dialogs = {}
         self.createControls()
 
         self.toolbar = self.CreateToolBar()
@@ -433,7 +434,7 @@ class BookViewerWindow(wx.Frame, MenubarProvider, StateProvider):
         )
 
     def get_selection_range(self):
-        return SelectionRange(*self.contentTextCtrl.GetSelection())
+        return self.contentTextCtrl.GetSelection()
 
     def get_containing_line(self, pos):
         """
@@ -452,8 +453,7 @@ class BookViewerWindow(wx.Frame, MenubarProvider, StateProvider):
 
     def get_line_number(self, pos=None):
         pos = pos or self.contentTextCtrl.InsertionPoint
-        __, __, line_number = self.contentTextCtrl.PositionToXY(pos)
-        return line_number
+        return self.contentTextCtrl.GetLineNumberFromPosition(pos)
 
     def select_text(self, fpos, tpos):
         self.contentTextCtrl.SetFocusFromKbd()
@@ -469,6 +469,20 @@ class BookViewerWindow(wx.Frame, MenubarProvider, StateProvider):
     def get_text_from_user(
         self, title, label, style=wx.OK | wx.CANCEL | wx.CENTER, value=""
     ):
-        dlg = wx.TextEntryDialog(self, label, title, style=style, value=value)
+        """Prompt the user for a line of text.
+
+        Returns the stripped input, or None when the dialog is cancelled,
+        so callers can tell an emptied field apart from a cancellation.
+        Dialogs are cached per prompt; repeated prompts, such as adding
+        several named bookmarks, skip the widget construction entirely.
+        """
+        key = (label, style)
+        dlg = self._text_entry_dialogs.get(key)
+        if dlg is None:
+            dlg = wx.TextEntryDialog(self, label, title, style=style)
+            self._text_entry_dialogs[key] = dlg
+        dlg.SetTitle(title)
+        dlg.SetValue(value)
         if dlg.ShowModal() == wx.ID_OK:
             return dlg.GetValue().strip()
+        return None
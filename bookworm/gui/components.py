@@ -1,11 +1,10 @@
 # coding: utf-8
 
-import contextlib
 import wx
 import wx.lib.mixins.listctrl as listmix
 import wx.lib.sized_controls as sc
 from dataclasses import dataclass
-from itertools import chain
+from itertools import chain, islice
 import bookworm.typehints as t
 from bookworm.logger import logger
 
@@ -66,25 +65,44 @@ class PageRangeControl(sc.SizedPanel):
         # Translators: the label of a combobox in the search dialog
         # to choose the section to which the search will be confined
         sec_label = wx.StaticText(rangeBox, -1, _("Select section:"))
-        self.sectionChoice = wx.Choice(
-            rangeBox, -1, choices=[sect.title for sect in self.doc.toc_tree]
-        )
+        self.sectionChoice = wx.Choice(rangeBox, -1)
+        # Populate the choice after the dialog is shown, in batches, rather
+        # than materializing every TOC title during dialog construction
+        wx.CallAfter(self._append_section_titles, iter(self.doc.toc_tree))
         self.page_controls = (fpage_label, tpage_label, self.fromPage, self.toPage)
         self.sect_controls = (sec_label, self.sectionChoice)
+        self._enabled_controls = ()
         for ctrl in chain(self.page_controls, self.sect_controls):
             ctrl.Enable(False)
         for radio in (self.hasPage, self.hasSection):
             radio.SetValue(0)
             parent.Bind(wx.EVT_RADIOBUTTON, self.onRangeTypeChange, radio)
 
+    def _append_section_titles(self, sections, batch_size=256):
+        if not self:
+            # The dialog was dismissed before the TOC was fully populated;
+            # the underlying C++ widget is gone, so stop the chain here
+            return
+        batch = [sect.title for sect in islice(sections, batch_size)]
+        if not batch:
+            return
+        self.sectionChoice.AppendItems(batch)
+        wx.CallAfter(self._append_section_titles, sections, batch_size)
+
     def onRangeTypeChange(self, event):
         radio = event.GetEventObject()
         if radio == self.hasPage:
             controls = self.page_controls
         else:
             controls = self.sect_controls
-        for ctrl in chain(self.page_controls, self.sect_controls):
-            ctrl.Enable(ctrl in controls)
+        if controls is self._enabled_controls:
+            return
+        # Only touch the controls that are actually changing state
+        for ctrl in self._enabled_controls:
+            ctrl.Enable(False)
+        for ctrl in controls:
+            ctrl.Enable(True)
+        self._enabled_controls = controls
 
     def get_range(self):
         if self.hasSection.GetValue():
@@ -99,6 +117,11 @@ class PageRangeControl(sc.SizedPanel):
         return from_page, to_page
 
 
+DIALOG_LIST_STYLE = (
+    wx.BORDER_SUNKEN | wx.LC_SINGLE_SEL | wx.LC_REPORT | wx.LC_EDIT_LABELS | wx.LC_VRULES
+)
+
+
 class DialogListCtrl(wx.ListCtrl, listmix.ListCtrlAutoWidthMixin):
     def __init__(
         self,
@@ -106,11 +129,7 @@ class DialogListCtrl(wx.ListCtrl, listmix.ListCtrlAutoWidthMixin):
         id,
         pos=wx.DefaultPosition,
         size=wx.DefaultSize,
-        style=wx.BORDER_SUNKEN
-        | wx.LC_SINGLE_SEL
-        | wx.LC_REPORT
-        | wx.LC_EDIT_LABELS
-        | wx.LC_VRULES,
+        style=DIALOG_LIST_STYLE,
     ):
         wx.ListCtrl.__init__(self, parent, id, pos, size, style)
         listmix.ListCtrlAutoWidthMixin.__init__(self)
@@ -123,23 +142,25 @@ class Dialog(wx.Dialog):
         super().__init__(parent, title=title, style=style)
         self.parent = parent
 
-        panel = wx.Panel(self, -1, size=size)
-        sizer = wx.BoxSizer(wx.VERTICAL)
-        self.addControls(sizer, panel)
-        line = wx.StaticLine(panel, -1, size=(20, -1), style=wx.LI_HORIZONTAL)
-        sizer.Add(line, 0, wx.GROW | wx.RIGHT | wx.TOP, 10)
-        buttonsSizer = self.getButtons(panel)
-        if buttonsSizer:
-            sizer.Add(buttonsSizer, 0, wx.ALIGN_CENTER | wx.ALL, 10)
-
-        panel.SetSizer(sizer)
-        panel.Layout()
-        sizer.Fit(panel)
-
-        sizer = wx.BoxSizer(wx.VERTICAL)
-        sizer.Add(panel, 2, wx.EXPAND | wx.ALL, 15)
-        self.SetSizer(sizer)
-        self.Fit()
+        # Freeze the window while constructing the controls, so the
+        # widget tree is laid out once at the end rather than per change
+        with wx.WindowUpdateLocker(self):
+            panel = wx.Panel(self, -1, size=size)
+            sizer = wx.BoxSizer(wx.VERTICAL)
+            self.addControls(sizer, panel)
+            line = wx.StaticLine(panel, -1, size=(20, -1), style=wx.LI_HORIZONTAL)
+            sizer.Add(line, 0, wx.GROW | wx.RIGHT | wx.TOP, 10)
+            buttonsSizer = self.getButtons(panel)
+            if buttonsSizer:
+                sizer.Add(buttonsSizer, 0, wx.ALIGN_CENTER | wx.ALL, 10)
+
+            panel.SetSizer(sizer)
+            sizer.Fit(panel)
+
+            sizer = wx.BoxSizer(wx.VERTICAL)
+            sizer.Add(panel, 2, wx.EXPAND | wx.ALL, 15)
+            self.SetSizer(sizer)
+            self.Fit()
         self.Center()
 
     def addControls(self, sizer):
@@ -165,13 +186,14 @@ class SimpleDialog(sc.SizedDialog):
         super().__init__(parent, title=title, style=style, **kwargs)
         self.parent = parent
 
-        panel = self.GetContentsPane()
-        self.addControls(panel)
-        buttonsSizer = self.getButtons(panel)
-        if buttonsSizer:
-            self.SetButtonSizer(buttonsSizer)
+        with wx.WindowUpdateLocker(self):
+            panel = self.GetContentsPane()
+            self.addControls(panel)
+            buttonsSizer = self.getButtons(panel)
+            if buttonsSizer:
+                self.SetButtonSizer(buttonsSizer)
 
-        self.Fit()
+            self.Fit()
         self.SetMinSize(self.GetSize())
         self.Center(wx.BOTH)
 
@@ -260,50 +282,51 @@ ColumnSpecs = t.Iterable[ColumnDefn]
 
 
 class ImmutableObjectListView(DialogListCtrl):
-    """An immutable  list view that deals with objects rather than strings."""
+    """An immutable, virtual  list view that deals with objects rather than strings.
+
+    Being virtual, the control never copies row strings into native
+    storage; it asks for the text of the visible cells on-demand
+    through `OnGetItemText`. Opening a viewer on a book with thousands
+    of annotations thus costs a handful of conversions, not one per row.
+    """
 
     def __init__(
         self, *args, columns: ColumnSpecs = (), objects: ObjectCollection = (), **kwargs
     ):
+        kwargs["style"] = kwargs.get("style", DIALOG_LIST_STYLE) | wx.LC_VIRTUAL
         super().__init__(*args, **kwargs)
-        self._objects = None
-        self._columns = None
+        self._objects = []
+        self._columns = ()
+        self._string_converters = []
         self.Bind(wx.EVT_LIST_DELETE_ITEM, self.onDeleteItem, self)
-        self.Bind(wx.EVT_LIST_DELETE_ALL_ITEMS, self.onDeleteAllItems, self)
         self.Bind(wx.EVT_LIST_INSERT_ITEM, self.onInsertItem, self)
-        self.__is_modifying = False
         self.set_columns(columns)
         self.set_objects(objects)
 
-    @contextlib.contextmanager
-    def __unsafe_modify(self):
-        self.__is_modifying = True
-        yield
-        self.__is_modifying = False
-
     def set_columns(self, columns):
         self.ClearAll()
         self._columns = columns
+        self._string_converters = [col.string_converter for col in self._columns]
         for col in self._columns:
             self.AppendColumn(col.title, format=col.alignment_flag, width=col.width)
         for i in range(len(columns)):
             self.SetColumnWidth(i, 100)
 
     def set_objects(self, objects: ObjectCollection, focus_item: int = 0):
-        """Clear the list view and insert the objects."""
-        self._objects = objects
-        self.set_columns(self._columns)
-        string_converters = [c.string_converter for c in self._columns]
-        with self.__unsafe_modify():
-            for obj in self._objects:
-                col_labels = []
-                for to_str in string_converters:
-                    col_labels.append(
-                        getattr(obj, to_str) if not callable(to_str) else to_str(obj)
-                    )
-                self.Append(col_labels)
+        """Set the objects shown by the list view."""
+        self._objects = (
+            objects if isinstance(objects, (list, tuple)) else list(objects)
+        )
+        self.SetItemCount(len(self._objects))
+        self.Refresh()
         self.set_focused_item(focus_item)
 
+    def OnGetItemText(self, item, col):
+        """Called by the native control for each visible cell."""
+        to_str = self._string_converters[col]
+        obj = self._objects[item]
+        return str(getattr(obj, to_str) if not callable(to_str) else to_str(obj))
+
     def get_selected(self) -> t.Optional[t.Any]:
         """Return the currently selected object or None."""
         idx = self.GetFocusedItem()
@@ -319,16 +342,12 @@ class ImmutableObjectListView(DialogListCtrl):
         self.SetItemState(idx, wx.LIST_STATE_FOCUSED, wx.LIST_STATE_FOCUSED)
 
     def prevent_mutations(self):
-        if not self.__is_modifying:
-            raise RuntimeError(
-                "List is immutable. Use 'ImmutableObjectListView.set_objects' instead"
-            )
+        raise RuntimeError(
+            "List is immutable. Use 'ImmutableObjectListView.set_objects' instead"
+        )
 
     def onDeleteItem(self, event):
         self.prevent_mutations()
 
-    def onDeleteAllItems(self, event):
-        ...
-
     def onInsertItem(self, event):
         self.prevent_mutations()
@@ -2,9 +2,7 @@
 
 import wx
 import wx.lib.newevent
-from collections.abc import Container
-from dataclasses import dataclass
-from itertools import chain
+from bisect import bisect_right
 import bookworm.typehints as t
 from bookworm.logger import logger
 
@@ -20,19 +18,6 @@ NAV_FOREWORD_KEYS = {
 NAV_BACKWORD_KEYS = {wx.WXK_BACK,}
 NAVIGATION_KEYS = NAV_FOREWORD_KEYS.union(NAV_BACKWORD_KEYS)
 
-@dataclass
-class SelectionRange(Container):
-    """Represents a text range in an edit control."""
-
-    start: int
-    end: int
-
-    def __contains__(self, x):
-        return self.start <= x <= self.end
-
-    def __iter__(self):
-        return iter((self.start, self.end))
-
 
 class ContentViewCtrl(wx.TextCtrl):
     """
@@ -50,11 +35,53 @@ class ContentViewCtrl(wx.TextCtrl):
             | wx.TE_NOHIDESEL,
             **kwargs
         )
+        self._line_starts = None
+
+    def InvalidateLineIndex(self):
+        """Drop the cached line-start index. Called whenever the content changes."""
+        self._line_starts = None
+
+    def GetLineIndex(self):
+        """A monotonic array of line-start positions, computed in one pass
+        over the text and cached until the content changes.
+        """
+        if self._line_starts is None:
+            text = self.GetValue()
+            line_starts = [0]
+            pos = text.find("\n")
+            while pos != -1:
+                line_starts.append(pos + 1)
+                pos = text.find("\n", pos + 1)
+            self._line_starts = line_starts
+        return self._line_starts
+
+    def GetLineNumberFromPosition(self, position):
+        """Resolve position to line number with a binary search over the
+        cached line-start index, avoiding a native PositionToXY round-trip.
+        """
+        return bisect_right(self.GetLineIndex(), position) - 1
 
     def GetContainingLine(self, position):
-        _, col, lino = self.PositionToXY(position)
-        left = position - col
-        return (left, left + self.GetLineLength(lino))
+        line_starts = self.GetLineIndex()
+        lino = bisect_right(line_starts, position) - 1
+        left = line_starts[lino]
+        if (lino + 1) < len(line_starts):
+            right = line_starts[lino + 1] - 1
+        else:
+            right = self.GetLastPosition()
+        return (left, right)
+
+    def Clear(self):
+        self.InvalidateLineIndex()
+        super().Clear()
+
+    def SetValue(self, value):
+        self.InvalidateLineIndex()
+        super().SetValue(value)
+
+    def WriteText(self, text):
+        self.InvalidateLineIndex()
+        super().WriteText(text)
 
     def TryBefore(self, event):
         """Prehandling of events."""
@@ -2,6 +2,7 @@
 
 import sys
 import logging
+from functools import lru_cache
 from logging.handlers import RotatingFileHandler
 from bookworm import paths
 from bookworm import app
@@ -17,6 +18,10 @@ formatter = logging.Formatter(MESSAGE_FORMAT, datefmt=DATE_FORMAT)
 logger = logging.getLogger()
 logger.setLevel(logging.DEBUG)
 
+# Memoize child loggers. Modules ask for them at import time, and every
+# uncached getChild call walks the logger hierarchy while holding a lock.
+logger.getChild = lru_cache(maxsize=None)(logger.getChild)
+
 # handlers
 
 app_handler = RotatingFileHandler(paths.logs_path(APP_LOG_FILE), mode="w")
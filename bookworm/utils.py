@@ -83,11 +83,11 @@ def restart_application(*extra_args, debug=False, restore=True):
 
 def recursively_iterdir(path):
     """Iterate over files, exclusively, in path and its sub directories."""
-    for item in Path(path).iterdir():
-        if item.is_dir():
-            yield from recursively_iterdir(item)
-        else:
-            yield item
+    # os.walk scans with os.scandir under the hood, which caches the
+    # stat information, rather than stat'ing each path separately
+    for dirpath, dirnames, filenames in os.walk(path, followlinks=False):
+        for filename in filenames:
+            yield Path(dirpath, filename)
 
 
 def gui_thread_safe(func):
@@ -101,18 +101,24 @@ def gui_thread_safe(func):
 
 
 def generate_sha1hash(content):
-    hasher = hashlib.sha1()
     is_file_like = hasattr(content, "seek")
     if not is_file_like:
         file = open(content, "rb")
     else:
         content.seek(0)
         file = content
-    for chunk in file:
-        hasher.update(chunk)
-    if not is_file_like:
-        file.close()
-    return hasher.hexdigest()
+    try:
+        if hasattr(hashlib, "file_digest"):
+            # Python 3.11+: reads straight into OpenSSL with no
+            # intermediate Python-level chunk objects
+            return hashlib.file_digest(file, "sha1").hexdigest()
+        hasher = hashlib.sha1()
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            hasher.update(chunk)
+        return hasher.hexdigest()
+    finally:
+        if not is_file_like:
+            file.close()
 
 
 @call_threaded
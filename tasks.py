@@ -10,21 +10,22 @@ import os
 import platform
 import shutil
 import json
-from io import BytesIO, StringIO
+import hashlib
+import base64
 from datetime import datetime
 from functools import wraps
-from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from glob import glob
 from pathlib import Path
 from tempfile import TemporaryDirectory
-from zipfile import ZipFile, ZIP_LZMA
-from lzma import compress
+from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED
 from invoke import task, call
-from invoke.exceptions import UnexpectedExit
 
 
 PROJECT_ROOT = Path.cwd()
 PACKAGE_FOLDER = PROJECT_ROOT / "bookworm"
+ICON_CACHE_FOLDER = PROJECT_ROOT / ".icon_cache"
+BUILD_CACHE_FOLDER = PROJECT_ROOT / ".build_cache"
 ICON_SIZE = (256, 256)
 GUIDE_HTML_TEMPLATE = """<!doctype html>
   <html lang="{lang}">
@@ -36,16 +37,112 @@ GUIDE_HTML_TEMPLATE = """<!doctype html>
   </body>
   </html>
 """
+IMAGE_DATA_HEADER = """\
+# coding: utf-8
+
+# This file was generated by the `make_icons` build task.
+# Do not edit it by hand.
+
+from wx.lib.embeddedimage import PyEmbeddedImage
+
+"""
 
 def invert_image(image_path):
+    """Invert the image colors, preserving the alpha channel."""
+    from PIL import Image, ImageOps
+
+    img = Image.open(image_path).convert("RGBA")
+    r, g, b, a = img.split()
+    inverted = ImageOps.invert(Image.merge("RGB", (r, g, b)))
+    inverted.putalpha(a)
+    return inverted
+
+
+def _freeze_cache_key():
+    """Hash the inputs that should force a clean PyInstaller build."""
+    hasher = hashlib.blake2b()
+    key_files = (
+        PROJECT_ROOT / "scripts" / "builder" / "Bookworm.spec",
+        PROJECT_ROOT / "setup.py",
+        PROJECT_ROOT / "requirements.txt",
+        PROJECT_ROOT / "invoke.yml",
+    )
+    for file in key_files:
+        if file.exists():
+            hasher.update(file.read_bytes())
+    return hasher.hexdigest()
+
+
+def _embed_image(out, name, png_file):
+    """Write one PyEmbeddedImage assignment for the given PNG file.
+
+    Emits the same base64 payload img2py would, without re-reading the
+    file per variable or recompressing the already-deflated PNG bytes.
+    """
+    data = base64.b64encode(png_file.read_bytes()).decode("ascii")
+    out.write(f"{name} = PyEmbeddedImage(\n")
+    for start in range(0, len(data), 64):
+        out.write(f'    b"{data[start:start + 64]}"\n')
+    out.write(")\n\n")
+
+
+def _archive_tree(archive, root):
+    """Write every file under `root` into the given archive.
+
+    Streams each file through a 1 MiB buffer rather than letting
+    ZipFile re-open it and copy through its small default chunks; on a
+    frozen tree of thousands of files the per-file overhead adds up.
+    """
+    from bookworm.utils import recursively_iterdir
+
+    for file in recursively_iterdir(root):
+        zinfo = ZipInfo.from_file(file, str(file.relative_to(root)))
+        zinfo.compress_type = archive.compression
+        with open(file, "rb") as src, archive.open(zinfo, "w") as dst:
+            shutil.copyfileobj(src, dst, length=1 << 20)
+
+
+def _icon_cache_key(imgfile, target_size):
+    """Content hash identifying a source image resized to the given size."""
+    return hashlib.blake2b(
+        imgfile.read_bytes() + repr(target_size).encode("utf-8")
+    ).hexdigest()
+
+
+def _load_icon_cache_manifest():
+    manifest_file = ICON_CACHE_FOLDER / "manifest.json"
+    if manifest_file.exists():
+        try:
+            return json.loads(manifest_file.read_text())
+        except json.JSONDecodeError:
+            pass
+    return {}
+
+
+def _save_icon_cache_manifest(manifest):
+    ICON_CACHE_FOLDER.mkdir(exist_ok=True)
+    (ICON_CACHE_FOLDER / "manifest.json").write_text(json.dumps(manifest, indent=2))
+
+
+def _prepare_icon(imgfile, temp, target_size):
+    """Resize an image, and its high contrast inversion, into `temp`.
+
+    Runs in a worker process; returns the base name along with the two
+    files that were written.
+    """
     from PIL import Image
-    from fitz import Pixmap
 
-    pix = Pixmap(image_path)
-    pix.invertIRect(pix.irect)
-    buffer = BytesIO(pix.getImageData())
-    del pix
-    return Image.open(buffer)
+    filename, ext = os.path.splitext(imgfile.name)
+    save_target = Path(temp) / imgfile.name
+    save_target_hc = Path(temp) / f"{filename}.hg{ext}"
+    Image.open(imgfile).resize(
+        target_size, resample=Image.LANCZOS
+    ).save(save_target)
+    # Create an inverted version for high contrast
+    invert_image(str(imgfile)).resize(
+        target_size, resample=Image.LANCZOS
+    ).save(save_target_hc)
+    return filename, save_target, save_target_hc
 
 
 def _add_envars(context):
@@ -89,8 +186,18 @@ def make_env(func):
 def make_icons(c):
     """Rescale images and embed them in a python module."""
     from PIL import Image
-    from PIL import ImageOps
-    from wx.tools.img2py import img2py
+
+    try:
+        from PIL import features
+
+        if not features.check_feature("libjpeg_turbo"):
+            print(
+                "Note: Pillow is not built against libjpeg-turbo. "
+                "Image decoding will use the slower vanilla libjpeg path."
+            )
+    except (ImportError, ValueError):
+        # Older Pillow releases know nothing about the libjpeg_turbo feature
+        pass
 
     TARGET_SIZE = (24, 24)
     IMAGE_SOURCE_FOLDER = PROJECT_ROOT / "fullsize_images"
@@ -98,32 +205,69 @@ def make_icons(c):
     print(f"Rescaling images and embedding them in {PY_MODULE}")
     if PY_MODULE.exists():
         PY_MODULE.unlink()
+    manifest = _load_icon_cache_manifest()
+    ICON_CACHE_FOLDER.mkdir(exist_ok=True)
     with TemporaryDirectory() as temp:
-        for index, imgfile in enumerate(Path(IMAGE_SOURCE_FOLDER).iterdir()):
-            filename, ext = os.path.splitext(imgfile.name)
-            if imgfile.is_dir() or ext != ".png":
-                continue
-            save_target = Path(temp) / imgfile.name
-            save_target_hc = Path(temp) / f"{filename}.hg{ext}"
-            Image.open(imgfile).resize(TARGET_SIZE).save(save_target)
-            # Create an inverted version for high contrast
-            invert_image(str(imgfile)).resize(TARGET_SIZE).save(save_target_hc)
-            append = bool(index)
-            with redirect_stdout(StringIO()):
-                img2py(
-                    python_file=str(PY_MODULE),
-                    image_file=str(save_target),
-                    imgName=f"_{filename}",
-                    append=append,
-                    compressed=True,
-                )
-                img2py(
-                    python_file=str(PY_MODULE),
-                    image_file=str(save_target_hc),
-                    imgName=f"_{filename}_hc",
-                    append=True,
-                    compressed=True,
-                )
+        temp_path = Path(temp)
+        image_files = [
+            Path(entry.path)
+            for entry in os.scandir(IMAGE_SOURCE_FOLDER)
+            if entry.name.endswith(".png") and entry.is_file(follow_symlinks=False)
+        ]
+        # The decode/resize/invert work is CPU bound and independent per
+        # image, so fan it out across worker processes, skipping images
+        # whose cached outputs are still valid. The embedding below stays
+        # sequential, in submission order, to keep the generated module
+        # deterministic.
+        with ProcessPoolExecutor() as executor:
+            pending = []
+            for imgfile in image_files:
+                filename, ext = os.path.splitext(imgfile.name)
+                cache_key = _icon_cache_key(imgfile, TARGET_SIZE)
+                cached = ICON_CACHE_FOLDER / imgfile.name
+                cached_hc = ICON_CACHE_FOLDER / f"{filename}.hg{ext}"
+                if (
+                    manifest.get(imgfile.name) == cache_key
+                    and cached.exists()
+                    and cached_hc.exists()
+                ):
+                    # Cache hit: reuse the outputs of a previous build
+                    save_target = temp_path / imgfile.name
+                    save_target_hc = temp_path / f"{filename}.hg{ext}"
+                    shutil.copyfile(cached, save_target)
+                    shutil.copyfile(cached_hc, save_target_hc)
+                    result = (filename, save_target, save_target_hc)
+                    future = None
+                else:
+                    result = None
+                    future = executor.submit(
+                        _prepare_icon, imgfile, temp, TARGET_SIZE
+                    )
+                pending.append((imgfile, cache_key, result, future))
+            with open(PY_MODULE, "w", encoding="utf-8") as module:
+                module.write(IMAGE_DATA_HEADER)
+                for imgfile, cache_key, result, future in pending:
+                    if future is not None:
+                        result = future.result()
+                        filename, save_target, save_target_hc = result
+                        shutil.copyfile(
+                            save_target, ICON_CACHE_FOLDER / save_target.name
+                        )
+                        shutil.copyfile(
+                            save_target_hc, ICON_CACHE_FOLDER / save_target_hc.name
+                        )
+                        manifest[imgfile.name] = cache_key
+                    else:
+                        filename, save_target, save_target_hc = result
+                    _embed_image(module, f"_{filename}", save_target)
+                    _embed_image(module, f"_{filename}_hc", save_target_hc)
+        # Evict entries whose source images are gone
+        for name in set(manifest).difference(
+            {imgfile.name for imgfile in image_files}
+        ):
+            if name.endswith(".png"):
+                manifest.pop(name, None)
+        _save_icon_cache_manifest(manifest)
         print("*" * 10 + " Done Embedding Images" + "*" * 10)
     print ("Creating installer images...")
     inst_dst = PROJECT_ROOT / "scripts" / "builder" / "assets"
@@ -137,14 +281,14 @@ def make_icons(c):
         if not imgfile.exists():
             print(f"Creating image {fname}.")
             Image.open(IMAGE_SOURCE_FOLDER / "logo" / "bookworm.png")\
-            .resize(imgsize)\
+            .resize(imgsize, resample=Image.LANCZOS)\
             .save(imgfile)
             print(f"Copied image {fname} to the assets folder.")
     website_header = PROJECT_ROOT / "docs" / "img" / "bookworm.png"
     if not website_header.exists():
         print("Website header logo is not there, creating it.")
         Image.open(IMAGE_SOURCE_FOLDER / "logo" / "bookworm.png").resize(
-            (256, 256)
+            (256, 256), resample=Image.LANCZOS
         ).save(website_header)
         print("Copied website header image  to the docs folder.")
 
@@ -163,21 +307,50 @@ def build_docs(c):
 
     print("Building documentations")
     docs_src = PROJECT_ROOT / "docs" / "userguides"
+    cache_file = BUILD_CACHE_FOLDER / "docs.json"
+    docs_dst = c["build_folder"] / "resources" / "docs"
+    try:
+        cache = json.loads(cache_file.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        cache = {}
     for folder in [fd for fd in docs_src.iterdir() if fd.is_dir()]:
         lang = folder.name
         md = folder / "bookworm.md"
-        html = c["build_folder"] / "resources" / "docs" / lang / "bookworm.html"
+        html = docs_dst / lang / "bookworm.html"
         html.parent.mkdir(parents=True, exist_ok=True)
         content_md = md.read_text(encoding="utf8")
+        # Key on the markdown source, the template, and the language, so
+        # edits to any of them invalidate the cached render
+        key = hashlib.sha1(
+            content_md.encode("utf8")
+            + GUIDE_HTML_TEMPLATE.encode("utf8")
+            + lang.encode("utf8")
+        ).hexdigest()
+        entry = cache.get(lang)
+        if (
+            entry is not None
+            and entry.get("key") == key
+            and html.exists()
+            # read_text normalizes the platform newlines that write_text
+            # produced, so this matches the recorded hash of the rendered
+            # markup on Windows as well
+            and hashlib.sha1(html.read_text(encoding="utf8").encode("utf8")).hexdigest()
+            == entry.get("output")
+        ):
+            continue
         content = markdown(content_md, escape=False)
         page_title = content_md.splitlines()[0].lstrip("#")
-        html.write_text(
-            GUIDE_HTML_TEMPLATE.format(
-                lang=lang, title=page_title.strip(), content=content
-            ),
-            encoding="utf8"
+        rendered = GUIDE_HTML_TEMPLATE.format(
+            lang=lang, title=page_title.strip(), content=content
         )
+        html.write_text(rendered, encoding="utf8")
+        cache[lang] = {
+            "key": key,
+            "output": hashlib.sha1(rendered.encode("utf8")).hexdigest(),
+        }
         print("Done building the documentations.")
+    BUILD_CACHE_FOLDER.mkdir(exist_ok=True)
+    cache_file.write_text(json.dumps(cache, indent=2))
 
 
 @task
@@ -193,14 +366,30 @@ def copy_assets(c):
         PROJECT_ROOT / "scripts" / "builder" / "assets" / "bookworm.ico": c["build_folder"],
     }
     for src, dst in files_to_copy.items():
-        c.run(f"copy {src} {dst}", hide="stdout")
+        shutil.copy2(src, dst)
     ficos_src = PROJECT_ROOT / "fullsize_images"/ "file_icons"
     ficos_dst = c["build_folder"] / "resources" / "icons"
     ficos_dst.mkdir(parents=True, exist_ok=True)
-    for img in [i for i in ficos_src.iterdir() if i.suffix == ".png"]:
+    manifest = _load_icon_cache_manifest()
+    ICON_CACHE_FOLDER.mkdir(exist_ok=True)
+    for img in [
+        Path(entry.path)
+        for entry in os.scandir(ficos_src)
+        if entry.name.endswith(".png") and entry.is_file(follow_symlinks=False)
+    ]:
+        ico_name = img.name.split(".")[0] + ".ico"
+        dst = ficos_dst.joinpath(ico_name)
+        cache_key = _icon_cache_key(img, ICON_SIZE)
+        cached_ico = ICON_CACHE_FOLDER / ico_name
+        if manifest.get(ico_name) == cache_key and cached_ico.exists():
+            shutil.copyfile(cached_ico, dst)
+            continue
         Image.open(img)\
-        .resize(ICON_SIZE)\
-        .save(ficos_dst.joinpath(img.name.split(".")[0] + ".ico"))
+        .resize(ICON_SIZE, resample=Image.LANCZOS)\
+        .save(dst)
+        shutil.copyfile(dst, cached_ico)
+        manifest[ico_name] = cache_key
+    _save_icon_cache_manifest(manifest)
     print("Done copying files.")
 
 
@@ -229,6 +418,9 @@ def extract_msgs(c):
         (
             f'-o "{str(PROJECT_ROOT / "scripts" / name)}.pot"',
             '-c "Translators:"',
+            # N_ marks strings that are defined before i18n is set up and
+            # translated later, e.g. the annotation menu item table
+            "-k N_",
             '--msgid-bugs-address "ibnomer2011@hotmail.com"',
             f'--copyright-holder="{author}"',
         )
@@ -292,9 +484,13 @@ def install_packages(c):
         packages = pkg_names["pure_python"] + [
             f"{arch}\\{pkg}" for pkg in binary_packages
         ]
-        for package in packages:
-            print(f"Installing package {package}")
-            c.run(f"pip install --upgrade {package}", hide="stdout")
+        # One pip invocation for the whole manifest; pip's startup and
+        # resolution costs a couple of seconds per call, which used to be
+        # paid once per package
+        os.environ["PIP_DISABLE_PIP_VERSION_CHECK"] = "1"
+        print("Installing packages: " + ", ".join(packages))
+        package_args = " ".join(f'"{package}"' for package in packages)
+        c.run(f"pip install --upgrade {package_args}", hide="stdout")
     with c.cd(str(PROJECT_ROOT)):
         print("Building Bookworm wheel.")
         c.run("py setup.py bdist_wheel", hide="stdout")
@@ -319,12 +515,12 @@ def clean(c, assets=False, siteconfig=False):
     """Remove intermediary build files and folders."""
     with c.cd(str(PROJECT_ROOT)):
         print("Cleaning compiled bytecode cache.")
-        for item in PROJECT_ROOT.iterdir():
-            if not item.is_dir() or item.name.startswith("."):
-                # A special folder, move on
-                continue
-            for pyc in PROJECT_ROOT.rglob("__pycache__"):
-                shutil.rmtree(pyc, ignore_errors=True)
+        for dirpath, dirnames, filenames in os.walk(PROJECT_ROOT):
+            # Prune special folders (.git, .venv, and friends) from the walk
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            if "__pycache__" in dirnames:
+                dirnames.remove("__pycache__")
+                shutil.rmtree(Path(dirpath) / "__pycache__", ignore_errors=True)
         print("Cleaning up temporary files and directories.")
         folders_to_clean = c["folders_to_clean"]["everytime"]
         if assets:
@@ -363,11 +559,15 @@ def copy_deps(c):
         f"C:\\Program Files (x86)\\Windows Kits\\10\\Redist\\ucrt\DLLs\\{arch}\\*",
     )
     for dll in dlls:
-        try:
-            c.run(f'copy "{dll}" "{dist_dir}"', hide="stdout")
-        except UnexpectedExit:
+        matches = glob(dll)
+        if not matches:
             print(f"Faild to copy  {dll} to {dist_dir}")
             continue
+        for match in matches:
+            try:
+                shutil.copy2(match, dist_dir)
+            except OSError:
+                print(f"Faild to copy  {match} to {dist_dir}")
     print("Done copying vcredis 2015 ucrt DLLs.")
 
 
@@ -378,6 +578,18 @@ def freeze(c):
     from bookworm import app
 
     print("Freezing the application...")
+    # PyInstaller's --clean discards its analysis cache, forcing a full
+    # re-analysis of every import. Only pay for that when the inputs
+    # that shape the freeze have changed, or on CI where builds must
+    # always start from scratch.
+    key_file = BUILD_CACHE_FOLDER / "freeze.key"
+    cache_key = _freeze_cache_key()
+    needs_clean = (
+        "APPVEYOR_BUILD_FOLDER" in os.environ
+        or not key_file.exists()
+        or key_file.read_text().strip() != cache_key
+    )
+    clean_flag = "--clean " if needs_clean else ""
     with c.cd(str(PROJECT_ROOT / "scripts" / "builder")):
         if app.get_version_info()["pre_type"] is None:
             print(
@@ -385,9 +597,11 @@ def freeze(c):
             )
             os.environ["PYTHONOPTIMIZE"] = "2"
         c.run(
-            f"pyinstaller Bookworm.spec --clean -y --distpath {c['build_folder'].parent}",
+            f"pyinstaller Bookworm.spec {clean_flag}-y --distpath {c['build_folder'].parent}",
             hide=True,
         )
+    BUILD_CACHE_FOLDER.mkdir(exist_ok=True)
+    key_file.write_text(cache_key)
     print("App freezed. Trying to copy system dlls.")
     copy_deps(c)
 
@@ -396,18 +610,17 @@ def freeze(c):
 @make_env
 def bundle_update(c):
     """Bundles the frozen app for use in updates.
-    Uses zip and lzma compression.
+    Uses zip and deflate compression.
     """
     print("Preparing update bundle...")
-    from bookworm.utils import recursively_iterdir
-
     env = os.environ
     frozen_dir = Path(env["IAPP_FROZEN_DIRECTORY"])
     fname = f"{env['IAPP_DISPLAY_NAME']}-{env['IAPP_VERSION']}-{env['IAPP_ARCH']}-update.bundle"
     bundle_file = PROJECT_ROOT / "scripts" / fname
-    with ZipFile(bundle_file, "w", compression=ZIP_LZMA, allowZip64=False) as archive:
-        for file in recursively_iterdir(frozen_dir):
-            archive.write(file, file.relative_to(frozen_dir))
+    with ZipFile(
+        bundle_file, "w", compression=ZIP_DEFLATED, compresslevel=6, allowZip64=True
+    ) as archive:
+        _archive_tree(archive, frozen_dir)
         archive.write(
             PROJECT_ROOT / "scripts" / "executables" / "bootstrap.exe", "bootstrap.exe"
         )
@@ -423,14 +636,23 @@ def update_version_info(c):
     json_file = artifacts_folder / "release-info.json"
     release_type = app.get_version_info()["pre_type"] or ""
     json_info = {release_type: {"version": app.version}}
-    artifacts = dict(
-        installer=artifacts_folder.glob("Bookworm*setup.exe"),
-        update_bundle=artifacts_folder.glob("Bookworm*update.bundle"),
-    )
-    for artifact_type, artifact_files in artifacts.items():
-        for file in artifact_files:
-            json_info[release_type][f"{file.name}.sha1hash"] = generate_sha1hash(file)
-    json_file.write_text(json.dumps(json_info, indent=2))
+    artifact_files = [
+        *artifacts_folder.glob("Bookworm*setup.exe"),
+        *artifacts_folder.glob("Bookworm*update.bundle"),
+    ]
+    # Hashing releases the GIL inside OpenSSL, so the installer and the
+    # update bundle can be digested in parallel
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        for file, sha1hash in zip(
+            artifact_files, executor.map(generate_sha1hash, artifact_files)
+        ):
+            json_info[release_type][f"{file.name}.sha1hash"] = sha1hash
+    try:
+        import orjson
+
+        json_file.write_bytes(orjson.dumps(json_info, option=orjson.OPT_INDENT_2))
+    except ImportError:
+        json_file.write_text(json.dumps(json_info, indent=2))
     print("Updated version information")
 
 
@@ -441,7 +663,7 @@ def copy_uwp_services_lib(c):
     uwp_services_path = PROJECT_ROOT / "includes" / "BookwormUWPServices"
     src = uwp_services_path / "bin" / build_config / "BookwormUWPServices.dll"
     dst = c["build_folder"]
-    c.run(f"copy {src} {dst}")
+    shutil.copy2(src, dst)
 
 
 @task(
@@ -456,16 +678,15 @@ def build(c):
 @task(name="create-portable")
 @make_env
 def create_portable_copy(c):
-    from bookworm.utils import recursively_iterdir
-
     print("Creating portable archive...")
     env = os.environ
     frozen_dir = Path(env["IAPP_FROZEN_DIRECTORY"])
     fname = f"{env['IAPP_DISPLAY_NAME']}-{env['IAPP_VERSION']}-portable.zip"
     port_arch = PROJECT_ROOT / "scripts" / fname
-    with ZipFile(port_arch, "w", compression=ZIP_LZMA, allowZip64=False) as archive:
-        for file in recursively_iterdir(frozen_dir):
-            archive.write(file, file.relative_to(frozen_dir))
+    with ZipFile(
+        port_arch, "w", compression=ZIP_DEFLATED, compresslevel=6, allowZip64=True
+    ) as archive:
+        _archive_tree(archive, frozen_dir)
     print(f"Portable archive created at {port_arch}.")
 
 